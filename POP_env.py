@@ -2,34 +2,82 @@ from gymnasium import Env, spaces
 import numpy as np
 from ctypes import CDLL, c_int, c_short
 import os
-from PIL import Image
 import ctypes
 
+# the game looks its data files up relative to the working directory, so
+# callers chdir here once per process before creating a POPEnv
+SDLPOP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "SDLPoP")
+LIB_PATH = os.path.join(SDLPOP_DIR, "src", "libSDLPoP.so")
+
+class RLStepOut(ctypes.Structure):
+    # mirrors rl_step_out_type in SDLPoP/src/types.h
+    _fields_ = [
+        ("reward", ctypes.c_float),
+        ("terminated", c_int),
+        ("hp", c_int),
+        ("room", c_int),
+        ("kid_dead", c_int),
+        ("have_sword", c_int),
+        ("frames", c_int),
+    ]
+
+class RLState(ctypes.Structure):
+    # mirrors rl_state_type in SDLPoP/src/types.h
+    _fields_ = [
+        ("hp", c_short),
+        ("hp_max", c_short),
+        ("level", c_short),
+        ("kid_dead", c_int),
+        ("have_sword", c_int),
+        ("room", c_int),
+        ("guard_hp", c_short),
+        ("obs", ctypes.c_float * 4),
+    ]
+
 class POPEnv(Env):
 
-    def __init__(self):
+    def __init__(self, max_pool=False):
         super(POPEnv, self).__init__()
         
-        self.path = "./SDLPoP"
-        os.chdir(self.path)
         os.environ["SDL_AUDIODRIVER"] = "dummy"
         
-        self.lib = CDLL("./src/libSDLPoP.so")
+        self.lib = CDLL(LIB_PATH)
         
         self.rl_step_mode = c_int.in_dll(self.lib, "rl_step_mode")
-        self.rl_action = c_int.in_dll(self.lib, "rl_action")
         self.start_level = c_int.in_dll(self.lib, "start_level")
         self.rl_kid_dead = c_int.in_dll(self.lib, "rl_kid_dead")
-        self.current_level = c_short.in_dll(self.lib, "current_level")
-        self.hitp_curr = c_short.in_dll(self.lib, "hitp_curr")
-        self.hitp_max = c_short.in_dll(self.lib, "hitp_max")
-        self.have_sword = c_int.in_dll(self.lib, "have_sword")
-        self.curr_room = c_int.in_dll(self.lib, "curr_room")
-        self.guardhp_curr = c_short.in_dll(self.lib, "guardhp_curr")
-        self.guardhp_prev = 0
-        self.frame_buffer = (ctypes.c_ubyte*(320*200*3))()
-        self.lib.rl_get_frame.argtypes = [ctypes.POINTER(ctypes.c_ubyte *(320*200*3))]
-        self.lib.rl_get_frame.restype = None
+        # max_pool: observation is the pixel-wise max of the last 2 skipped frames
+        self.rl_max_pool = c_int.in_dll(self.lib, "rl_max_pool")
+        self.rl_max_pool.value = int(max_pool)
+        # rl_get_obs84 grayscales and downsamples in C, only 84x84 bytes come back
+        self.obs_buffer = (ctypes.c_ubyte*(84*84))()
+        # ctypes arrays never move, so one numpy view aliases the buffer for good
+        self._obs_view = np.frombuffer(self.obs_buffer, dtype=np.uint8).reshape((84, 84, 1))
+        self._obs_ptr = ctypes.cast(self.obs_buffer, ctypes.c_void_p)
+        self.lib.rl_get_obs84.argtypes = [ctypes.c_void_p]
+        self.lib.rl_get_obs84.restype = None
+        self.lib.rl_get_obs84_maxpool.argtypes = [ctypes.c_void_p]
+        self.lib.rl_get_obs84_maxpool.restype = None
+        self._read_obs84 = self.lib.rl_get_obs84_maxpool if max_pool else self.lib.rl_get_obs84
+        # the per-step calls take raw pointers to structs that live as long as
+        # the env, so ctypes doesn't build a byref for them on every call
+        self._step_out = RLStepOut()
+        self._step_out_ptr = ctypes.c_void_p(ctypes.addressof(self._step_out))
+        self.lib.rl_step_obs.argtypes = [c_int, c_int, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p]
+        self.lib.rl_step_obs.restype = None
+        self._rl_step_obs = self.lib.rl_step_obs
+        self.lib.rl_snapshot.argtypes = [ctypes.c_void_p]
+        self.lib.rl_snapshot.restype = None
+        self._state = RLState()
+        self._state_ptr = ctypes.c_void_p(ctypes.addressof(self._state))
+        self._rl_snapshot = self.lib.rl_snapshot
+        # the state observation is normalized in C, read it through a view
+        self._state_buf = np.ctypeslib.as_array(self._state.obs)
+        # same dict and arrays every step, filled in place; the vec envs copy
+        # observations on their side so nothing downstream sees them change
+        self._obs = {"pixels": self._obs_view, "state": self._state_buf}
+        # returned for terminated steps, whose observation nothing bootstraps from
+        self._zero_obs = {"pixels": np.zeros_like(self._obs_view), "state": np.zeros_like(self._state_buf)}
         self.rl_step_mode.value = 1
         self.start_level.value = 1
         self.lib.pop_main()
@@ -48,105 +96,74 @@ class POPEnv(Env):
         self.total_reward = 0.0
         self.step_count = 0
         self.max_steps = 2000000
-        self.prev_hp = None
+        # rooms are numbered 1..24, a flag per possible room id beats a set
+        self.visited_rooms = bytearray(256)
     
     def _get_obs(self) -> dict:
-        self.lib.rl_get_frame(ctypes.byref(self.frame_buffer))
-
-        norm_hitp_curr = self.hitp_curr.value / self.hitp_max.value
-        norm_hitp_max = self.hitp_max.value / 10.0
-        norm_current_level = self.current_level.value / 15.0
-        is_alive = 1.0 if self.rl_kid_dead.value == 0 else 0.0
-
-        state = np.array([norm_hitp_curr, norm_hitp_max, norm_current_level, is_alive], dtype=np.float32)
-        pixels = np.frombuffer(self.frame_buffer, dtype=np.uint8).reshape((200, 320, 3))
-        img = Image.fromarray(pixels).convert('L').resize((84, 84), Image.BILINEAR)
-        pixels = np.array(img, dtype=np.uint8)[:, :, np.newaxis]
-        return {"pixels": pixels, "state": state}
+        # step() gets its observation from rl_step_obs; this is for reset and
+        # for the rare terminated-and-truncated step
+        self._read_obs84(self._obs_ptr)
+        self._rl_snapshot(self._state_ptr)
+
+        return self._obs
     
     def reset(self, seed=None, options=None):
         super().reset(seed=seed, options=options)
 
         self.init_game(1)
+        self.lib.rl_reset_tracking()
 
         self.rl_kid_dead.value = 0
         self.episode_return = 0.0
         self.step_count = 0
         self.got_sword = 0
-        self.prev_hp = self.hitp_curr.value
-        self.guardhp_prev = self.guardhp_curr.value
-        self.visited_rooms = set()
-        start_room = self.curr_room.value
-        self.visited_rooms.add(start_room)
-        self.prev_room_id = start_room
 
         obs = self._get_obs()
-        info = {"hp": self.hitp_curr.value}
+        self.visited_rooms[:] = bytes(256)
+        self.visited_rooms[self._state.room] = 1
+        info = {"hp": self._state.hp}
 
         return obs, info
 
     
     def step(self, action: int):
-        self.rl_action.value = action
-        
-        step_reward = 0.0
         num_skip = 4 #frameskips
-        terminated = False
-
-        for _ in range(num_skip):
-
-            self.lib.play_level_2()
-            self.step_count += 1
-            current_hp = self.hitp_curr.value
-            frame_reward = -0.01
-
-            if self.prev_hp is not None and current_hp < self.prev_hp:
-                frame_reward -= 1
-            #potions
-            if self.prev_hp is not None and current_hp > self.prev_hp:
-                frame_reward += 1
-
-            if self.rl_kid_dead.value == 1:
-                frame_reward -= 10
-                terminated = True
-
-            if self.current_level.value > 1:
-                frame_reward += 10
-                terminated = True
-
-            if self.have_sword.value > self.got_sword:
-                frame_reward += 7
-                self.got_sword = self.have_sword.value
-                self.visited_rooms.clear()
-                self.visited_rooms.add(self.curr_room.value)
-
-            room_id = self.curr_room.value
-            if room_id not in self.visited_rooms:
-                frame_reward += 4 
-                self.visited_rooms.add(room_id)
-
-            guardhp_curr = self.guardhp_curr.value
-            if room_id == self.prev_room_id:
-                if guardhp_curr < self.guardhp_prev:
-                    if guardhp_curr > 0:
-                        frame_reward += 2.0
-                    elif self.guardhp_prev > 0:
-                        frame_reward += 3.0
-
-            self.prev_room_id = room_id
-            self.guardhp_prev = guardhp_curr
-            self.prev_hp = current_hp
-            step_reward += frame_reward
-
-            if terminated:
-                break
+        out = self._step_out
+        # one call per agent step: plays the skipped frames, sums the
+        # hp/death/level/sword/guard rewards and, unless terminated, fills the
+        # obs buffers. The frame is read once per step (plus the one captured
+        # for max_pool), never for every skipped tick.
+        self._rl_step_obs(action, num_skip, self._step_out_ptr, self._obs_ptr, self._state_ptr)
+
+        self.step_count += out.frames
+        step_reward = out.reward
+        terminated = bool(out.terminated)
+
+        if out.have_sword > self.got_sword:
+            self.got_sword = out.have_sword
+            self.visited_rooms[:] = bytes(256)
+            self.visited_rooms[out.room] = 1
+
+        if not self.visited_rooms[out.room]:
+            step_reward += 4
+            self.visited_rooms[out.room] = 1
         
         self.total_reward += step_reward
-        obs = self._get_obs()
         truncated = self.step_count >= self.max_steps
+        if terminated and not truncated:
+            # PPO doesn't bootstrap past a real terminal state and the vec env
+            # resets next, so rl_step_obs skipped the pixel readback
+            obs = self._zero_obs
+        elif truncated:
+            # the value of a truncated obs is bootstrapped; copy it since the
+            # reset that follows overwrites the shared buffers
+            obs = self._get_obs() if terminated else self._obs
+            obs = {key: value.copy() for key, value in obs.items()}
+        else:
+            obs = self._obs
         
         info = {
-            "hp": self.hitp_curr.value,
+            "hp": out.hp,
             "step": self.step_count,
             "total_reward": self.total_reward,
             "has_sword": self.got_sword
@@ -214,6 +214,11 @@ void do_mouse(void);
 int flash_if_hurt(void);
 void remove_flash_if_hurt(void);
 void rl_save_frame(const char *filename);
+void rl_reset_tracking(void);
+void rl_step(int action, int skip, rl_step_out_type *out);
+void rl_snapshot(rl_state_type *out);
+void rl_step_obs(int action, int skip, rl_step_out_type *out,
+                 unsigned char *obs, rl_state_type *state);
 
 // SEG004.C
 void check_collisions(void);
@@ -535,6 +540,10 @@ image_type *get_image(short chtab_id, int id);
 
 // SEG009.C
 void sdlperror(const char *header);
+void rl_get_obs84(unsigned char *dest);
+void rl_pool_prev_obs84(void);
+void rl_pool_clear(void);
+void rl_get_obs84_maxpool(unsigned char *dest);
 bool file_exists(const char *filename);
 #define locate_file(filename)                                                  \
   locate_file_(filename, alloca(POP_MAX_PATH), POP_MAX_PATH)
@@ -35,6 +35,13 @@ The authors of this program may be contacted at https://forum.princed.org
 int rl_step_mode = 0;
 int rl_action = 0;
 int rl_kid_dead = 0; // Set to 1 when Kid dies, Python should reset
+int rl_max_pool = 0; // Set to 1 to max-pool the last 2 frames of each step
+
+// Previous-frame values used by rl_step() to compute rewards
+static word rl_prev_hp = 0;
+static word rl_prev_guardhp = 0;
+static short rl_prev_room = 0;
+static word rl_got_sword = 0;
 
 // Save a frame to a file for RL debugging
 void rl_save_frame(const char *filename) {
@@ -501,6 +508,96 @@ int play_level_2() {
   }
 }
 
+// RL: snapshot the values rl_step() compares against; call after init_game()
+void rl_reset_tracking(void) {
+  rl_prev_hp = hitp_curr;
+  rl_prev_guardhp = guardhp_curr;
+  rl_prev_room = curr_room;
+  rl_got_sword = 0;
+  // a frame captured by the step that ended the last episode is stale now
+  rl_pool_clear();
+}
+
+// RL: play up to `skip` frames holding `action` and accumulate the reward,
+// so Python makes a single ctypes call per agent step instead of reading
+// every global after every frame. Visited-room bonuses stay in Python.
+void rl_step(int action, int skip, rl_step_out_type *out) {
+  float reward = 0.0f;
+  int terminated = 0;
+  int frames = 0;
+  rl_action = action;
+  while (frames < skip && !terminated) {
+    play_level_2();
+    ++frames;
+    if (rl_max_pool && frames == skip - 1)
+      rl_pool_prev_obs84();
+    reward -= 0.01f;
+    if (hitp_curr < rl_prev_hp)
+      reward -= 1.0f;
+    // potions
+    if (hitp_curr > rl_prev_hp)
+      reward += 1.0f;
+    if (rl_kid_dead == 1) {
+      reward -= 10.0f;
+      terminated = 1;
+    }
+    if (current_level > 1) {
+      reward += 10.0f;
+      terminated = 1;
+    }
+    if (have_sword > rl_got_sword) {
+      reward += 7.0f;
+      rl_got_sword = have_sword;
+    }
+    // guardhp_curr is unsigned, so a drop always means the guard had hp left
+    if (curr_room == rl_prev_room && guardhp_curr < rl_prev_guardhp) {
+      reward += guardhp_curr > 0 ? 2.0f : 3.0f;
+    }
+    rl_prev_room = curr_room;
+    rl_prev_guardhp = guardhp_curr;
+    rl_prev_hp = hitp_curr;
+  }
+  out->reward = reward;
+  out->terminated = terminated;
+  out->hp = hitp_curr;
+  out->room = curr_room;
+  out->kid_dead = rl_kid_dead;
+  out->have_sword = rl_got_sword;
+  out->frames = frames;
+}
+
+// RL: copy the globals the observation needs in one ctypes call
+void rl_snapshot(rl_state_type *out) {
+  out->hp = hitp_curr;
+  out->hp_max = hitp_max;
+  out->level = current_level;
+  out->kid_dead = rl_kid_dead;
+  out->have_sword = have_sword;
+  out->room = curr_room;
+  out->guard_hp = guardhp_curr;
+  out->obs[0] = hitp_max ? (float)hitp_curr / hitp_max : 0.0f;
+  out->obs[1] = hitp_max / 10.0f;
+  out->obs[2] = current_level / 15.0f;
+  out->obs[3] = rl_kid_dead == 0 ? 1.0f : 0.0f;
+}
+
+// RL: a whole agent step in one ctypes call. rl_step(), then unless the
+// episode terminated, the next observation into `obs` (84x84) and `state`.
+void rl_step_obs(int action, int skip, rl_step_out_type *out,
+                 unsigned char *obs, rl_state_type *state) {
+  rl_step(action, skip, out);
+  if (out->terminated) {
+    // no readback, so nothing will consume a frame captured for max_pool
+    rl_pool_clear();
+    return;
+  }
+  if (rl_max_pool)
+    rl_get_obs84_maxpool(obs);
+  else
+    rl_get_obs84(obs);
+  rl_snapshot(state);
+}
+
 // seg003:0576
 void redraw_at_char() {
   short x_top_row;
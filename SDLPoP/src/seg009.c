@@ -58,6 +58,150 @@ void rl_get_frame(unsigned char* dest)
 
 }
 
+#define RL_OBS_SIZE 84
+
+// RL: luma of one row of 24-bit pixels, using (0.299, 0.587, 0.114) * 128.
+// 7-bit weights so they fit the signed operand of the AVX2 path below.
+static void rl_luma_row_c(const Uint8* src, Uint8* dest, int width) {
+	for (int x = 0; x < width; ++x, src += 3) {
+		dest[x] = (Uint8)((38 * src[0] + 75 * src[1] + 15 * src[2]) >> 7);
+	}
+}
+
+#if defined(__GNUC__) && (defined(__x86_64__) || defined(__i386__))
+#include <immintrin.h>
+#define RL_HAVE_AVX2
+
+// Same result as rl_luma_row_c, 16 pixels per iteration. Each 128-bit lane
+// gets 4 RGB triplets spread to RGB0 quads, maddubs dots them against the
+// weights and hadd folds the (R+G, B) pairs into one 16-bit luma per pixel.
+__attribute__((target("avx2")))
+static void rl_luma_row_avx2(const Uint8* src, Uint8* dest, int width) {
+	const __m256i spread = _mm256_setr_epi8(
+		0, 1, 2, -1, 3, 4, 5, -1, 6, 7, 8, -1, 9, 10, 11, -1,
+		0, 1, 2, -1, 3, 4, 5, -1, 6, 7, 8, -1, 9, 10, 11, -1);
+	const __m256i weights = _mm256_setr_epi8(
+		38, 75, 15, 0, 38, 75, 15, 0, 38, 75, 15, 0, 38, 75, 15, 0,
+		38, 75, 15, 0, 38, 75, 15, 0, 38, 75, 15, 0, 38, 75, 15, 0);
+	int x = 0;
+	// the last load reads 52 bytes from the start of the block
+	for (; x + 18 <= width; x += 16, src += 48) {
+		__m256i a = _mm256_inserti128_si256(_mm256_castsi128_si256(
+			_mm_loadu_si128((const __m128i*) src)),
+			_mm_loadu_si128((const __m128i*) (src + 12)), 1); // pixels 0-3 | 4-7
+		__m256i b = _mm256_inserti128_si256(_mm256_castsi128_si256(
+			_mm_loadu_si128((const __m128i*) (src + 24))),
+			_mm_loadu_si128((const __m128i*) (src + 36)), 1); // pixels 8-11 | 12-15
+		a = _mm256_maddubs_epi16(_mm256_shuffle_epi8(a, spread), weights);
+		b = _mm256_maddubs_epi16(_mm256_shuffle_epi8(b, spread), weights);
+		// lanes hold pixels 0-3, 8-11 | 4-7, 12-15; restore order before packing
+		__m256i sum = _mm256_srli_epi16(_mm256_hadd_epi16(a, b), 7);
+		sum = _mm256_permute4x64_epi64(sum, _MM_SHUFFLE(3, 1, 2, 0));
+		_mm_storeu_si128((__m128i*) (dest + x), _mm_packus_epi16(
+			_mm256_castsi256_si128(sum), _mm256_extracti128_si256(sum, 1)));
+	}
+	rl_luma_row_c(src, dest + x, width - x);
+}
+#endif
+
+// RL: area-resample weights for one axis, like OpenCV's INTER_AREA.
+// Source pixel i covers [i*out, (i+1)*out) and output pixel o covers
+// [o*in, (o+1)*in), both in units of 1/(in*out). Since out < in, a source
+// pixel overlaps at most two outputs: first[i] gets weight[i], first[i]+1
+// gets out - weight[i]. Every output pixel's weights sum to in.
+static void rl_area_weights(int in, int out, Uint8* first, Uint8* weight) {
+	for (int i = 0; i < in; ++i) {
+		int o = i * out / in;
+		first[i] = (Uint8) o;
+		weight[i] = (Uint8) (MIN((i + 1) * out, (o + 1) * in) - i * out);
+	}
+}
+
+// RL: write the 84x84 grayscale observation straight from the screen surface,
+// area-averaged the way cv2.resize(..., INTER_AREA) does, so only 7056 bytes
+// cross into Python instead of the 320x200 RGB frame.
+void rl_get_obs84(unsigned char* dest)
+{
+	static void (*luma_row)(const Uint8*, Uint8*, int) = NULL;
+	static Uint8 x_first[320], x_weight[320];
+	static Uint8 y_first[200], y_weight[200];
+	Uint8 luma[320];
+	Uint32 row[RL_OBS_SIZE + 1];
+	Uint32 acc[RL_OBS_SIZE + 1][RL_OBS_SIZE];
+
+	SDL_Surface* surface = get_final_surface();
+	if(!surface || !dest) return;
+	if (surface->format->BytesPerPixel != 3) return;
+
+	if (luma_row == NULL) {
+		rl_area_weights(320, RL_OBS_SIZE, x_first, x_weight);
+		rl_area_weights(200, RL_OBS_SIZE, y_first, y_weight);
+		luma_row = rl_luma_row_c;
+#ifdef RL_HAVE_AVX2
+		if (__builtin_cpu_supports("avx2")) luma_row = rl_luma_row_avx2;
+#endif
+	}
+
+	// the extra row/column only ever receives zero weight
+	memset(acc, 0, sizeof(acc));
+	if (SDL_MUSTLOCK(surface)) SDL_LockSurface(surface);
+	const Uint8* pixels = (const Uint8*) surface->pixels;
+	for (int y = 0; y < 200; ++y) {
+		luma_row(pixels + y * surface->pitch, luma, 320);
+		memset(row, 0, sizeof(row));
+		for (int x = 0; x < 320; ++x) {
+			row[x_first[x]] += luma[x] * x_weight[x];
+			row[x_first[x] + 1] += luma[x] * (RL_OBS_SIZE - x_weight[x]);
+		}
+		Uint32* acc0 = acc[y_first[y]];
+		Uint32* acc1 = acc[y_first[y] + 1];
+		Uint32 w0 = y_weight[y];
+		Uint32 w1 = RL_OBS_SIZE - w0;
+		for (int ox = 0; ox < RL_OBS_SIZE; ++ox) {
+			acc0[ox] += row[ox] * w0;
+			acc1[ox] += row[ox] * w1;
+		}
+	}
+	if (SDL_MUSTLOCK(surface)) SDL_UnlockSurface(surface);
+
+	// weights sum to 320 * 200 per output pixel; round to nearest
+	for (int i = 0; i < RL_OBS_SIZE * RL_OBS_SIZE; ++i) {
+		dest[i] = (Uint8) ((acc[i / RL_OBS_SIZE][i % RL_OBS_SIZE] + 320 * 200 / 2) / (320 * 200));
+	}
+}
+
+static Uint8 rl_pool_obs[RL_OBS_SIZE * RL_OBS_SIZE];
+static int rl_pool_valid = 0;
+
+// RL: called by rl_step() on the next-to-last skipped frame when
+// rl_max_pool is set, so the emitted observation can be max-pooled with it.
+void rl_pool_prev_obs84(void)
+{
+	rl_get_obs84(rl_pool_obs);
+	rl_pool_valid = 1;
+}
+
+// RL: drop a captured frame that no observation consumed, e.g. when the
+// step that captured it terminated and skipped its readback.
+void rl_pool_clear(void)
+{
+	rl_pool_valid = 0;
+}
+
+// RL: rl_get_obs84, max-pooled Atari-style with the frame before it to hide
+// sprites that flicker between frames. Falls back to the plain observation
+// when no earlier frame was captured this step: right after reset, or when
+// the step ended before reaching its next-to-last frame.
+void rl_get_obs84_maxpool(unsigned char* dest)
+{
+	rl_get_obs84(dest);
+	if (!rl_pool_valid) return;
+	for (int i = 0; i < RL_OBS_SIZE * RL_OBS_SIZE; ++i) {
+		dest[i] = MAX(dest[i], rl_pool_obs[i]);
+	}
+	rl_pool_valid = 0;
+}
+
 char exe_dir[POP_MAX_PATH] = ".";
 bool found_exe_dir = false;
 #if ! (defined WIN32 || _WIN32 || WIN64 || _WIN64)
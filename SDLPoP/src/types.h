@@ -1371,6 +1371,30 @@ typedef struct custom_options_type {
 
 typedef struct directory_listing_type directory_listing_type;
 
+// Filled by rl_step(); mirrored by RLStepOut in POP_env.py.
+typedef struct rl_step_out_type {
+  float reward;
+  int terminated;
+  int hp;
+  int room;
+  int kid_dead;
+  int have_sword;
+  int frames; // frames actually played (less than skip if terminated)
+} rl_step_out_type;
+
+// Filled by rl_snapshot(); mirrored by RLState in POP_env.py.
+typedef struct rl_state_type {
+  short hp;
+  short hp_max;
+  short level;
+  int kid_dead;
+  int have_sword;
+  int room;
+  short guard_hp;
+  // normalized hp, hp_max, level and alive flag: the "state" observation
+  float obs[4];
+} rl_state_type;
+
 #define BASE_FPS 60
 
 #define FEATHER_FALL_LENGTH 18.75
@@ -1,12 +1,44 @@
+import os
+# one env per core already; keep numpy/torch in the workers from spawning BLAS
+# pools. this caps the trainer process too, which is fine as it trains on cuda
+os.environ["OMP_NUM_THREADS"] = "1"
+os.environ["MKL_NUM_THREADS"] = "1"
+os.environ["OPENBLAS_NUM_THREADS"] = "1"
+
 import gymnasium
 from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import SubprocVecEnv, VecTransposeImage
+from stable_baselines3.common.vec_env import VecTransposeImage
 from stable_baselines3.common.monitor import Monitor
 from stable_baselines3.common.utils import set_random_seed
-from POP_env import POPEnv
+from POP_env import POPEnv, SDLPOP_DIR
+from shmem_vec_env import ShmemVecEnv
+
+def cpus_physical_first():
+    # allowed cpus, one per physical core first, then their SMT siblings
+    allowed = os.sched_getaffinity(0)
+    physical, siblings, seen = [], [], set()
+    for cpu in sorted(allowed):
+        try:
+            with open(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list") as f:
+                core = f.read().strip()
+        except OSError:
+            core = cpu
+        if core in seen:
+            siblings.append(cpu)
+        else:
+            seen.add(core)
+            physical.append(cpu)
+    return physical + siblings
 
-def make_env(rank, seed=0):
+def make_env(rank, num_envs, seed=0):
     def _init():
+        # give each worker its own cpu, physical cores before siblings (linux
+        # only); with more workers than cpus, pinning would stack them, so don't
+        if hasattr(os, "sched_setaffinity"):
+            cpus = cpus_physical_first()
+            if num_envs <= len(cpus):
+                os.sched_setaffinity(0, {cpus[rank]})
+        os.chdir(SDLPOP_DIR)
         env = POPEnv()
         env.reset(seed=seed + rank)
         env = Monitor(env)
@@ -16,7 +48,7 @@ def make_env(rank, seed=0):
 
 def train():
     num_cpu = 12
-    env = SubprocVecEnv([make_env(i) for i in range(num_cpu)])
+    env = ShmemVecEnv([make_env(i, num_cpu) for i in range(num_cpu)])
     env = VecTransposeImage(env)
 
     model = PPO(
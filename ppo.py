@@ -1,10 +1,12 @@
+import os
 import gymnasium
 from stable_baselines3 import PPO
 from stable_baselines3.common.vec_env import DummyVecEnv, VecTransposeImage
 from stable_baselines3.common.monitor import Monitor
-from POP_env import POPEnv
+from POP_env import POPEnv, SDLPOP_DIR
 
 def make_env():
+    os.chdir(SDLPOP_DIR)
     env = POPEnv()
     env = Monitor(env)
     return env
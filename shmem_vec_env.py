@@ -0,0 +1,172 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import SubprocVecEnv, VecEnv
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper
+from stable_baselines3.common.vec_env.patch_gym import _patch_env
+
+# SubprocVecEnv, but each worker writes its observation into a shared memory
+# block per observation key instead of pickling it through the pipe every step.
+# Rewards, dones and infos (including terminal_observation) still go over the pipe.
+#
+# _worker and ShmemVecEnv.__init__ are copied from stable_baselines3 2.7.1
+# (common/vec_env/subproc_vec_env.py, the version pinned in requirements.txt),
+# with the step/reset replies and the "attach" command changed for shared
+# memory. They rely on SB3 internals (_patch_env, calling VecEnv.__init__
+# directly, the worker command protocol that the inherited get_attr/set_attr/
+# env_method/close speak), so re-diff them against SB3 when upgrading it.
+
+
+def _obs_boxes(space):
+    # (key, Box) pairs, key is None for a plain Box observation space
+    if isinstance(space, spaces.Dict):
+        return list(space.spaces.items())
+    return [(None, space)]
+
+
+def _obs_views(blocks, space, n_envs):
+    return {
+        key: np.ndarray((n_envs,) + box.shape, dtype=box.dtype, buffer=block.buf)
+        for (key, box), block in zip(_obs_boxes(space), blocks)
+    }
+
+
+def _worker(remote, parent_remote, env_fn_wrapper, rank):
+    from stable_baselines3.common.env_util import is_wrapped
+
+    parent_remote.close()
+    env = _patch_env(env_fn_wrapper.var())
+    blocks = []
+    views = {}
+
+    def write_obs(obs):
+        if isinstance(obs, dict):
+            for key, view in views.items():
+                view[rank] = obs[key]
+        else:
+            views[None][rank] = obs
+
+    while True:
+        try:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                observation, reward, terminated, truncated, info = env.step(data)
+                done = terminated or truncated
+                info["TimeLimit.truncated"] = truncated and not terminated
+                reset_info = {}
+                if done:
+                    info["terminal_observation"] = observation
+                    observation, reset_info = env.reset()
+                write_obs(observation)
+                remote.send((reward, done, info, reset_info))
+            elif cmd == "reset":
+                maybe_options = {"options": data[1]} if data[1] else {}
+                observation, reset_info = env.reset(seed=data[0], **maybe_options)
+                write_obs(observation)
+                remote.send(reset_info)
+            elif cmd == "attach":
+                names, n_envs = data
+                blocks = [shared_memory.SharedMemory(name=name) for name in names]
+                views = _obs_views(blocks, env.observation_space, n_envs)
+                remote.send(None)
+            elif cmd == "render":
+                remote.send(env.render())
+            elif cmd == "close":
+                env.close()
+                views = {}
+                for block in blocks:
+                    block.close()
+                remote.close()
+                break
+            elif cmd == "get_spaces":
+                remote.send((env.observation_space, env.action_space))
+            elif cmd == "env_method":
+                method = env.get_wrapper_attr(data[0])
+                remote.send(method(*data[1], **data[2]))
+            elif cmd == "get_attr":
+                remote.send(env.get_wrapper_attr(data))
+            elif cmd == "has_attr":
+                try:
+                    env.get_wrapper_attr(data)
+                    remote.send(True)
+                except AttributeError:
+                    remote.send(False)
+            elif cmd == "set_attr":
+                remote.send(setattr(env, data[0], data[1]))
+            elif cmd == "is_wrapped":
+                remote.send(is_wrapped(env, data))
+            else:
+                raise NotImplementedError(f"`{cmd}` is not implemented in the worker")
+        except (EOFError, KeyboardInterrupt):
+            break
+
+
+class ShmemVecEnv(SubprocVecEnv):
+
+    def __init__(self, env_fns, start_method=None):
+        self.waiting = False
+        self.closed = False
+        n_envs = len(env_fns)
+
+        if start_method is None:
+            forkserver_available = "forkserver" in mp.get_all_start_methods()
+            start_method = "forkserver" if forkserver_available else "spawn"
+        ctx = mp.get_context(start_method)
+
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(n_envs)])
+        self.processes = []
+        for rank, (work_remote, remote, env_fn) in enumerate(zip(self.work_remotes, self.remotes, env_fns)):
+            args = (work_remote, remote, CloudpickleWrapper(env_fn), rank)
+            process = ctx.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        self.remotes[0].send(("get_spaces", None))
+        observation_space, action_space = self.remotes[0].recv()
+
+        # one block per observation key, holding that key for every env
+        self._blocks = [
+            shared_memory.SharedMemory(create=True, size=n_envs * int(np.prod(box.shape)) * np.dtype(box.dtype).itemsize)
+            for _, box in _obs_boxes(observation_space)
+        ]
+        self._views = _obs_views(self._blocks, observation_space, n_envs)
+        names = [block.name for block in self._blocks]
+        for remote in self.remotes:
+            remote.send(("attach", (names, n_envs)))
+        for remote in self.remotes:
+            remote.recv()
+
+        VecEnv.__init__(self, n_envs, observation_space, action_space)
+
+    def _read_obs(self):
+        # copy out: the workers overwrite the blocks on the next step while
+        # the caller may still hold on to this observation
+        if None in self._views:
+            return self._views[None].copy()
+        return {key: view.copy() for key, view in self._views.items()}
+
+    def step_wait(self):
+        results = [remote.recv() for remote in self.remotes]
+        self.waiting = False
+        rews, dones, infos, self.reset_infos = zip(*results)
+        return self._read_obs(), np.stack(rews), np.stack(dones), infos
+
+    def reset(self):
+        for env_idx, remote in enumerate(self.remotes):
+            remote.send(("reset", (self._seeds[env_idx], self._options[env_idx])))
+        self.reset_infos = [remote.recv() for remote in self.remotes]
+        self._reset_seeds()
+        self._reset_options()
+        return self._read_obs()
+
+    def close(self):
+        if self.closed:
+            return
+        super().close()
+        self._views = {}
+        for block in self._blocks:
+            block.close()
+            block.unlink()